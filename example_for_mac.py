@@ -1,18 +1,20 @@
+import os
+
 import torch
 import torchaudio as ta
 from chatterbox.tts import ChatterboxTTS
+from chatterbox._mps_compat import patch_torch_load_for_device
 
 # Detect device (Mac with M1/M2/M3/M4)
 device = "mps" if torch.backends.mps.is_available() else "cpu"
-map_location = torch.device(device)
 
-torch_load_original = torch.load
-def patched_torch_load(*args, **kwargs):
-    if 'map_location' not in kwargs:
-        kwargs['map_location'] = map_location
-    return torch_load_original(*args, **kwargs)
+# Load checkpoints straight onto the detected device
+patch_torch_load_for_device(device)
 
-torch.load = patched_torch_load
+# Ops without an MPS kernel fall back to the CPU; let them use every core, and
+# skip autograd bookkeeping since this script only runs inference
+torch.set_num_threads(os.cpu_count() or 4)
+torch.set_grad_enabled(False)
 
 model = ChatterboxTTS.from_pretrained(device=device)
 
@@ -28,12 +30,13 @@ AUDIO_PROMPT_PATH = "sampling/my_sample.wav"
 # Voice cloning parameters:
 # - cfg_weight: Lower values = better voice cloning (use 0.1-0.3, not 0.0)
 # - exaggeration: 0.0-1.0 controls emotion/expressiveness
-wav = model.generate(
-    text,
-    audio_prompt_path=AUDIO_PROMPT_PATH,
-    exaggeration=0.5,
-    cfg_weight=0.2,
-    temperature=0.8,
-)
+with torch.inference_mode():
+    wav = model.generate(
+        text,
+        audio_prompt_path=AUDIO_PROMPT_PATH,
+        exaggeration=0.5,
+        cfg_weight=0.2,
+        temperature=0.8,
+    )
 ta.save("test_voice_clone.wav", wav, model.sr)
 print("DONE - Output saved to test_voice_clone.wav")
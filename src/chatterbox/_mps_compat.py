@@ -0,0 +1,24 @@
+import torch
+
+
+def patch_torch_load_for_device(device: str):
+    """
+    Make torch.load default to `map_location=device`, so checkpoints saved on
+    CUDA load on machines without it (e.g. Apple Silicon with MPS).
+
+    Safe to call more than once: torch.load is only ever wrapped a single time,
+    so repeated calls don't stack wrappers around every checkpoint load.
+    """
+    if getattr(torch.load, "_chatterbox_patched", False):
+        return
+
+    torch_load_original = torch.load
+    map_location = torch.device(device)
+
+    def patched_torch_load(*args, **kwargs):
+        if 'map_location' not in kwargs:
+            kwargs['map_location'] = map_location
+        return torch_load_original(*args, **kwargs)
+
+    patched_torch_load._chatterbox_patched = True
+    torch.load = patched_torch_load
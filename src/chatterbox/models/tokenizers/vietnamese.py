@@ -2,15 +2,18 @@
 # Vietnamese text normalization for Chatterbox TTS
 # MIT License
 
+import importlib.util
 import unicodedata
 import re
+from functools import lru_cache
+from itertools import product
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Vietnamese character set for validation
-VIETNAMESE_CHARS = set(
+VIETNAMESE_CHARS = frozenset(
     'aàảãáạăằẳẵắặâầẩẫấậ'
     'eèẻẽéẹêềểễếệ'
     'iìỉĩíị'
@@ -27,6 +30,22 @@ VIETNAMESE_CHARS = set(
     'Đ'
 )
 
+# Every character kept as-is by normalization: all of ASCII (letters, digits,
+# punctuation, whitespace) plus the Vietnamese letters
+_KEEP = VIETNAMESE_CHARS | frozenset(map(chr, range(128)))
+
+# Runs of anything outside _KEEP that is not whitespace either; the regex
+# engine scans the text in C and only these rare runs reach the Python
+# callback, once per run. Whitespace is left for the final collapse.
+_DISALLOWED_RE = re.compile(r'[^\s' + re.escape(''.join(sorted(_KEEP))) + ']+')
+
+# Pattern used by expand_numbers, compiled once at import
+_NUM_RE = re.compile(r'\b\d+\b')
+
+# Number expansion and punctuation padding fused into a single scan for
+# preprocess_for_tts
+_NUM_OR_PUNCT_RE = re.compile(r'\b(\d+)\b|([.,!?;:])')
+
 # Common Vietnamese abbreviations and their expansions
 # Only include abbreviations with periods to avoid matching partial words
 ABBREVIATIONS = {
@@ -50,6 +69,28 @@ ABBREVIATIONS = {
     'TT.': 'thị trấn',
 }
 
+
+def _case_variants(word: str) -> set:
+    """All upper/lower case spellings of a word ('tp.' -> 'tp.', 'Tp.', 'tP.', 'TP.')."""
+    return {''.join(chars) for chars in product(*({c.lower(), c.upper()} for c in word))}
+
+
+# Abbreviations are matched case-insensitively. Every spelling is listed
+# explicitly so _ABBR_RE can stay case-sensitive.
+_ABBR_VARIANTS = {
+    variant: expansion
+    for abbr, expansion in ABBREVIATIONS.items()
+    for variant in _case_variants(abbr)
+}
+
+# All abbreviations in one alternation (longest first so no key is shadowed by a prefix),
+# matched at word boundaries only (start of string or after whitespace)
+_ABBR_RE = re.compile(
+    r'(?:^|(?<=\s))('
+    + '|'.join(re.escape(abbr) for abbr in sorted(_ABBR_VARIANTS, key=len, reverse=True))
+    + ')'
+)
+
 # Number words in Vietnamese
 NUMBER_WORDS = {
     '0': 'không',
@@ -65,6 +106,50 @@ NUMBER_WORDS = {
     '10': 'mười',
 }
 
+# Labels for the 3-digit groups within a 'tỷ' (10^9) block
+GROUP_LABELS = ['', 'nghìn', 'triệu']
+
+# Numbers from here up (long IDs, codes) are read digit by digit, which keeps
+# the spoken length linear in the number of digits
+GROUPED_READING_LIMIT = 10 ** 18
+
+
+@lru_cache(maxsize=4096)
+def _is_letter(char: str) -> bool:
+    return unicodedata.category(char)[0] == 'L'
+
+
+def _keep_letters(match: re.Match) -> str:
+    """Keep other letters (might be Vietnamese combining chars), drop the rest."""
+    return ''.join(char for char in match.group(0) if _is_letter(char))
+
+
+def _normalize_chars(text: str, expand_abbreviations: bool = True) -> str:
+    """
+    NFC-normalize, expand abbreviations and filter characters, leaving
+    whitespace as-is so the caller can collapse it once at the very end.
+    """
+    # Plain ASCII (e.g. English prompts) is always NFC and passes the character
+    # filter untouched, so only the abbreviation step applies
+    is_ascii = text.isascii()
+
+    # Normalize Unicode to NFC (composed form) - important for Vietnamese
+    # NFC keeps characters like 'ố' as single characters. Most input is already
+    # NFC, so let the quick check skip the copy in that case.
+    if not is_ascii and not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+
+    # Expand abbreviations
+    if expand_abbreviations:
+        text = _ABBR_RE.sub(lambda m: _ABBR_VARIANTS[m.group(1)], text)
+
+    # Remove or replace problematic characters while keeping Vietnamese
+    # Keep: Vietnamese chars, ASCII letters, numbers, basic punctuation
+    if not is_ascii:
+        text = _DISALLOWED_RE.sub(_keep_letters, text)
+
+    return text
+
 
 def vietnamese_normalize(text: str, expand_abbreviations: bool = True) -> str:
     """
@@ -80,89 +165,96 @@ def vietnamese_normalize(text: str, expand_abbreviations: bool = True) -> str:
     if not text:
         return text
 
-    # Normalize Unicode to NFC (composed form) - important for Vietnamese
-    # NFC keeps characters like 'ố' as single characters
-    text = unicodedata.normalize('NFC', text)
-
-    # Expand abbreviations
-    if expand_abbreviations:
-        for abbr, expansion in ABBREVIATIONS.items():
-            # Match at word boundaries only (start of string or after whitespace)
-            # For abbreviations ending with period, look for word boundary before
-            pattern = re.compile(r'(?:^|(?<=\s))' + re.escape(abbr), re.IGNORECASE)
-            text = pattern.sub(expansion, text)
+    text = _normalize_chars(text, expand_abbreviations)
 
     # Normalize whitespace
-    text = ' '.join(text.split())
-
-    # Remove or replace problematic characters while keeping Vietnamese
-    # Keep: Vietnamese chars, ASCII letters, numbers, basic punctuation
-    cleaned = []
-    for char in text:
-        if char.isascii() or char in VIETNAMESE_CHARS or char in ' .,!?;:\'"()-':
-            cleaned.append(char)
-        elif unicodedata.category(char).startswith('L'):
-            # Keep other letters (might be Vietnamese combining chars)
-            cleaned.append(char)
+    return ' '.join(text.split())
 
-    text = ''.join(cleaned)
-
-    return text.strip()
 
+def _read_tens(num: int, parts: list) -> None:
+    """Append the words for 1-99 to ``parts``."""
+    if num < 10:
+        parts.append(NUMBER_WORDS[str(num)])
+        return
 
+    if num < 20:
+        parts.append('mười')
+        ones = num % 10
+        if ones == 5:
+            parts.append('lăm')
+        elif ones:
+            parts.append(NUMBER_WORDS[str(ones)])
+        return
+
+    tens = num // 10
+    ones = num % 10
+    parts.append(NUMBER_WORDS[str(tens)])
+    parts.append('mươi')
+    if ones == 1:
+        parts.append('mốt')
+    elif ones == 5:
+        parts.append('lăm')
+    elif ones:
+        parts.append(NUMBER_WORDS[str(ones)])
+
+
+def _read_group(num: int, padded: bool, parts: list) -> None:
+    """
+    Append the words for a non-zero 3-digit group to ``parts``. Groups after
+    the leading one are padded, i.e. read with their hundreds even when zero
+    ('không trăm lẻ năm').
+    """
+    if num < 100 and not padded:
+        _read_tens(num, parts)
+        return
+
+    hundreds = num // 100
+    remainder = num % 100
+    parts.append(NUMBER_WORDS[str(hundreds)])
+    parts.append('trăm')
+    if remainder == 0:
+        return
+    if remainder < 10:
+        parts.append('lẻ')
+        parts.append(NUMBER_WORDS[str(remainder)])
+        return
+    _read_tens(remainder, parts)
+
+
+@lru_cache(maxsize=4096)
 def number_to_vietnamese(num: int) -> str:
     """Convert a number to Vietnamese words."""
-    if num < 0:
-        return 'âm ' + number_to_vietnamese(-num)
-
     if num == 0:
         return 'không'
 
-    if num < 10:
-        return NUMBER_WORDS[str(num)]
+    # Collect words in a list and join once at the end
+    parts = []
+    if num < 0:
+        parts.append('âm')
+        num = -num
 
-    if num < 20:
-        if num == 10:
-            return 'mười'
-        ones = num % 10
-        if ones == 5:
-            return 'mười lăm'
-        return 'mười ' + NUMBER_WORDS[str(ones)]
+    digits = str(num)
+    if num >= GROUPED_READING_LIMIT:
+        parts.extend(NUMBER_WORDS[d] for d in digits)
+        return ' '.join(parts)
 
-    if num < 100:
-        tens = num // 10
-        ones = num % 10
-        result = NUMBER_WORDS[str(tens)] + ' mươi'
-        if ones == 0:
-            return result
-        if ones == 1:
-            return result + ' mốt'
-        if ones == 5:
-            return result + ' lăm'
-        return result + ' ' + NUMBER_WORDS[str(ones)]
-
-    if num < 1000:
-        hundreds = num // 100
-        remainder = num % 100
-        result = NUMBER_WORDS[str(hundreds)] + ' trăm'
-        if remainder == 0:
-            return result
-        if remainder < 10:
-            return result + ' lẻ ' + NUMBER_WORDS[str(remainder)]
-        return result + ' ' + number_to_vietnamese(remainder)
-
-    if num < 1000000:
-        thousands = num // 1000
-        remainder = num % 1000
-        result = number_to_vietnamese(thousands) + ' nghìn'
-        if remainder == 0:
-            return result
-        if remainder < 100:
-            return result + ' không trăm ' + number_to_vietnamese(remainder)
-        return result + ' ' + number_to_vietnamese(remainder)
-
-    # For larger numbers, just read digits
-    return ' '.join(NUMBER_WORDS.get(d, d) for d in str(num))
+    # 3-digit groups, least significant first
+    groups = [int(digits[max(0, i - 3):i]) for i in range(len(digits), 0, -3)]
+
+    # Read from the most significant group down. The fourth group closes the
+    # 'tỷ' block, which the two above it extend (nghìn tỷ, triệu tỷ).
+    last = len(groups) - 1
+    for idx in range(last, -1, -1):
+        group = groups[idx]
+        scale, position = divmod(idx, 3)
+        if group:
+            _read_group(group, idx < last, parts)
+            if GROUP_LABELS[position]:
+                parts.append(GROUP_LABELS[position])
+        if scale and position == 0 and any(groups[idx:idx + 3]):
+            parts.append('tỷ')
+
+    return ' '.join(parts)
 
 
 def expand_numbers(text: str) -> str:
@@ -176,15 +268,26 @@ def expand_numbers(text: str) -> str:
             return num_str
 
     # Replace standalone numbers (not part of words)
-    return re.sub(r'\b\d+\b', replace_number, text)
+    return _NUM_RE.sub(replace_number, text)
 
 
 def validate_vietnamese_text(text: str) -> bool:
     """Check if text contains valid Vietnamese characters."""
-    for char in text:
-        if char.isalpha() and char not in VIETNAMESE_CHARS and not char.isascii():
-            return False
-    return True
+    # Only the distinct characters need checking, and anything in _KEEP
+    # (ASCII or Vietnamese) is valid without further tests
+    return not any(char.isalpha() for char in set(text).difference(_KEEP))
+
+
+def _expand_number_or_pad(match: re.Match) -> str:
+    """Expand a number to Vietnamese words, or pad punctuation with spaces."""
+    if match.lastindex == 2:
+        return ' ' + match.group(2) + ' '
+    num_str = match.group(1)
+    try:
+        return number_to_vietnamese(int(num_str))
+    except ValueError:
+        # e.g. runs longer than the int/str conversion limit (4300 digits)
+        return num_str
 
 
 def preprocess_for_tts(text: str) -> str:
@@ -197,31 +300,44 @@ def preprocess_for_tts(text: str) -> str:
     Returns:
         Preprocessed text ready for tokenization
     """
-    # Step 1: Basic normalization
-    text = vietnamese_normalize(text)
+    # Step 1: Basic normalization (whitespace is collapsed once, in step 2)
+    text = _normalize_chars(text)
 
-    # Step 2: Expand numbers
-    text = expand_numbers(text)
+    # Step 2: Expand numbers and handle punctuation for better prosody in one
+    # scan. Add slight pause markers (spaces) around punctuation
+    text = _NUM_OR_PUNCT_RE.sub(_expand_number_or_pad, text)
+    text = ' '.join(text.split())  # Normalize whitespace
 
-    # Step 3: Handle punctuation for better prosody
-    # Add slight pause markers (spaces) around punctuation
-    text = re.sub(r'([.,!?;:])', r' \1 ', text)
-    text = ' '.join(text.split())  # Normalize whitespace again
-
-    # Step 4: Capitalize first letter
+    # Step 3: Capitalize first letter
     if text and text[0].islower():
         text = text[0].upper() + text[1:]
 
     return text
 
 
-# Optional: Integration with underthesea for word segmentation
-try:
-    from underthesea import word_tokenize as vn_word_tokenize
-    HAS_UNDERTHESEA = True
-except ImportError:
-    HAS_UNDERTHESEA = False
-    vn_word_tokenize = None
+# Optional: Integration with underthesea for word segmentation. The import is
+# deferred to the first segment_words call since it loads NLP models. Until
+# then HAS_UNDERTHESEA only says whether the package is installed; the first
+# call sets it from the actual import result, and vn_word_tokenize is None
+# until the import succeeds.
+HAS_UNDERTHESEA = importlib.util.find_spec('underthesea') is not None
+vn_word_tokenize = None
+
+
+def _load_underthesea():
+    global HAS_UNDERTHESEA, vn_word_tokenize
+
+    if HAS_UNDERTHESEA and vn_word_tokenize is None:
+        try:
+            from underthesea import word_tokenize
+            vn_word_tokenize = word_tokenize
+        except ImportError:
+            HAS_UNDERTHESEA = False
+
+
+@lru_cache(maxsize=1024)
+def _segment_cached(text: str) -> str:
+    return vn_word_tokenize(text, format="text")
 
 
 def segment_words(text: str) -> str:
@@ -229,9 +345,11 @@ def segment_words(text: str) -> str:
     Segment Vietnamese text into words using underthesea.
     Falls back to original text if underthesea is not available.
     """
+    _load_underthesea()
+
     if HAS_UNDERTHESEA and vn_word_tokenize:
         try:
-            return vn_word_tokenize(text, format="text")
+            return _segment_cached(text)
         except Exception as e:
             logger.warning(f"Word segmentation failed: {e}")
             return text